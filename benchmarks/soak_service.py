@@ -0,0 +1,155 @@
+"""
+Soak test: runs thousands of service cycles against an in-memory fake IMAP
+server and reports RSS growth, to catch leaks in the long-running loop.
+
+Each cycle the fake user receives new mail, reads the previous cycle's
+messages and archives the tagged ones, so the mailbox stays the same size
+and any steady growth comes from the service itself.
+
+Usage: python -m benchmarks.soak_service [cycles] [--trace]
+"""
+import os
+import sys
+import time
+import random
+import logging
+import tempfile
+from unittest.mock import patch
+from email.message import EmailMessage
+
+from src.config import config
+from src.diagnostics import MemoryMonitor, rss_bytes
+from src.model import TaggingModel
+from src.service import EmailTaggerService
+
+TOPICS = {
+    "Work": "project meeting report budget quarterly review schedule deadline client".split(),
+    "Personal": "weekend party movie dinner family holiday birthday garden concert".split(),
+}
+TAG_MAPPING = {"Work": "WorkFolder", "Personal": "PersonalFolder"}
+MESSAGES_PER_CYCLE = 5
+
+def make_message(rng, topic):
+    msg = EmailMessage()
+    words = TOPICS[topic]
+    msg['Subject'] = " ".join(rng.choices(words, k=4))
+    msg.set_content(" ".join(rng.choices(words, k=200)))
+    msg.add_alternative(f"<p>{' '.join(rng.choices(words, k=100))}</p>", subtype='html')
+    return msg.as_bytes()
+
+class FakeImapServer:
+    """Implements the subset of IMAPClient used by ImapManager."""
+
+    def __init__(self):
+        self.folders = {}
+        self.uidnext = {}
+        self.selected = None
+        self.moved = 0
+
+    def deliver(self, folder, body, flags=()):
+        uid = self.uidnext.get(folder, 1)
+        self.uidnext[folder] = uid + 1
+        self.folders.setdefault(folder, {})[uid] = (body, set(flags))
+        return uid
+
+    def login(self, user, password):
+        pass
+
+    def logout(self):
+        pass
+
+    def noop(self):
+        pass
+
+    def folder_exists(self, folder):
+        return folder in self.folders
+
+    def select_folder(self, folder):
+        self.selected = folder
+        self.folders.setdefault(folder, {})
+        return {b'UIDVALIDITY': 1, b'EXISTS': len(self.folders[folder])}
+
+    def search(self, criteria):
+        messages = self.folders[self.selected]
+        if criteria == ['UNSEEN']:
+            return [uid for uid, (_, flags) in messages.items() if b'\\Seen' not in flags]
+        if criteria[0] == 'KEYWORD':
+            return [uid for uid, (_, flags) in messages.items() if criteria[1] in flags]
+        return list(messages)
+
+    def fetch(self, uids, items):
+        messages = self.folders[self.selected]
+        if items == ['RFC822.SIZE']:
+            return {uid: {b'RFC822.SIZE': len(messages[uid][0])} for uid in uids if uid in messages}
+        return {uid: {b'BODY[]': messages[uid][0]} for uid in uids if uid in messages}
+
+    def add_flags(self, uid, flags):
+        self.folders[self.selected][uid][1].update(flags)
+
+    def move(self, uids, folder):
+        messages = self.folders[self.selected]
+        for uid in uids:
+            if uid in messages:
+                messages.pop(uid)
+                # Filed mail is never read again; drop it to keep the mailbox bounded
+                self.moved += 1
+
+def simulate_user(server, rng):
+    """Reads the inbox, archives tagged messages and receives new mail."""
+    inbox = server.folders.setdefault(config.INBOX_FOLDER, {})
+    for uid, (body, flags) in list(inbox.items()):
+        del inbox[uid]
+        tags = [flag for flag in flags if flag in TAG_MAPPING]
+        if tags:
+            server.deliver(config.ARCHIVE_FOLDER, body, tags)
+    for _ in range(MESSAGES_PER_CYCLE):
+        server.deliver(config.INBOX_FOLDER, make_message(rng, rng.choice(list(TOPICS))))
+
+def main():
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    cycles = int(args[0]) if args else 2000
+    trace = "--trace" in sys.argv
+
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger("src.diagnostics").setLevel(logging.INFO)
+    rng = random.Random(0)
+    server = FakeImapServer()
+    for tag, folder in TAG_MAPPING.items():
+        for _ in range(20):
+            server.deliver(folder, make_message(rng, tag))
+
+    tmp_dir = tempfile.mkdtemp()
+    config.TAG_MAPPING = TAG_MAPPING
+    config.JOURNAL_PATH = os.path.join(tmp_dir, "journal.db")
+
+    with patch('src.imap_manager.IMAPClient', return_value=server):
+        service = EmailTaggerService()
+        service.model = TaggingModel(model_path=os.path.join(tmp_dir, "model.pkl"))
+        service.memory = MemoryMonitor(trace=trace, report_interval=cycles // 4)
+        service.initialize()
+        service.memory.start()
+
+        samples = []
+        start = time.perf_counter()
+        for cycle in range(1, cycles + 1):
+            simulate_user(server, rng)
+            service.run_cycle()
+            service.memory.check()
+            if cycle % (cycles // 10 or 1) == 0:
+                samples.append((cycle, rss_bytes()))
+
+        elapsed = time.perf_counter() - start
+        service.memory.stop()
+        service.journal.close()
+
+    print(f"{cycles} cycles, {server.moved} messages filed, {elapsed:.1f} s")
+    for cycle, rss in samples:
+        print(f"  cycle {cycle:>6}: RSS {rss / 1024 / 1024:7.1f} MB")
+    # Ignore the first sample, which includes warm-up allocations
+    first_cycle, first_rss = samples[0]
+    last_cycle, last_rss = samples[-1]
+    growth = (last_rss - first_rss) / 1024 / max(last_cycle - first_cycle, 1) * 1000
+    print(f"RSS growth after warm-up: {growth:.1f} KB per 1000 cycles")
+
+if __name__ == "__main__":
+    main()
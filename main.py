@@ -39,6 +39,9 @@ import getpass
 
 logger = logging.getLogger(__name__)
 
+# Exit status when the service stops itself to be restarted (see MAX_RSS_MB)
+RESTART_EXIT_CODE = 75
+
 def is_imap_server_reachable():
     logger.info("Testing IMAP connectivity...")
     try:
@@ -81,5 +84,9 @@ def main():
     service = EmailTaggerService()
     service.run()
 
+    if service.restart_requested:
+        # Exit non-zero so systemd restarts us after RestartSec
+        sys.exit(RESTART_EXIT_CODE)
+
 if __name__ == "__main__":
     main()
@@ -13,6 +13,11 @@ class Config:
         self.INBOX_FOLDER = os.environ.get("INBOX_FOLDER", "INBOX")
         self.ARCHIVE_FOLDER = os.environ.get("ARCHIVE_FOLDER", "Archive")
         self.POLL_INTERVAL = int(os.environ.get("POLL_INTERVAL", 60))
+        self.JOURNAL_PATH = os.environ.get("JOURNAL_PATH", "journal.db")
+        self.MAX_BATCH_MB = int(os.environ.get("MAX_BATCH_MB", 16))
+        self.MAX_RSS_MB = int(os.environ.get("MAX_RSS_MB", 0))
+        self.TRACEMALLOC = os.environ.get("TRACEMALLOC", "").lower() in ("1", "true", "yes")
+        self.DIAGNOSTICS_INTERVAL = int(os.environ.get("DIAGNOSTICS_INTERVAL", 60))
         self.TAG_MAPPING = {}
 
     def load_from_file(self, config_path="config.json"):
@@ -26,6 +31,11 @@ class Config:
                 self.INBOX_FOLDER = data.get("INBOX_FOLDER", self.INBOX_FOLDER)
                 self.ARCHIVE_FOLDER = data.get("ARCHIVE_FOLDER", self.ARCHIVE_FOLDER)
                 self.POLL_INTERVAL = data.get("POLL_INTERVAL", self.POLL_INTERVAL)
+                self.JOURNAL_PATH = data.get("JOURNAL_PATH", self.JOURNAL_PATH)
+                self.MAX_BATCH_MB = data.get("MAX_BATCH_MB", self.MAX_BATCH_MB)
+                self.MAX_RSS_MB = data.get("MAX_RSS_MB", self.MAX_RSS_MB)
+                self.TRACEMALLOC = data.get("TRACEMALLOC", self.TRACEMALLOC)
+                self.DIAGNOSTICS_INTERVAL = data.get("DIAGNOSTICS_INTERVAL", self.DIAGNOSTICS_INTERVAL)
                 self.TAG_MAPPING = data.get("TAG_MAPPING", self.TAG_MAPPING) 
         else:
             logger.warning(f"Config file {config_path} not found. Using defaults/env vars.")
@@ -0,0 +1,99 @@
+import os
+import sys
+import resource
+import logging
+import tracemalloc
+
+logger = logging.getLogger(__name__)
+
+def rss_bytes():
+    """Returns the resident set size of this process in bytes."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        # No procfs: fall back to the peak RSS, reported in KB on Linux and bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+class MemoryMonitor:
+    """
+    Tracks memory use of the long-running service.
+
+    Logs RSS every report_interval cycles and, when trace is enabled, the
+    allocation sites that grew most since start() according to tracemalloc.
+    check() reports when RSS exceeds max_rss_mb so the service can be
+    restarted before the host runs out of memory. A ceiling that is already
+    exceeded at start() is disabled, since restarting could never help,
+    unless keep_limit says a restart would start smaller.
+    """
+
+    def __init__(self, max_rss_mb=0, trace=False, report_interval=60, top=10):
+        self.max_rss_bytes = max_rss_mb * 1024 * 1024
+        self.trace = trace
+        self.report_interval = report_interval
+        self.top = top
+        self.cycles = 0
+        self.baseline = None
+
+    def start(self, keep_limit=False):
+        if self.trace:
+            tracemalloc.start()
+            self.baseline = self._take_snapshot()
+            logger.info("tracemalloc enabled for memory diagnostics.")
+
+        if self.over_limit() and not keep_limit:
+            logger.error(
+                f"RSS {rss_bytes() / 1024 / 1024:.1f} MB already exceeds limit of "
+                f"{self.max_rss_bytes / 1024 / 1024:.0f} MB at startup. Disabling the limit."
+            )
+            self.max_rss_bytes = 0
+
+    def over_limit(self):
+        """Returns True if RSS is above the configured ceiling."""
+        return bool(self.max_rss_bytes) and rss_bytes() > self.max_rss_bytes
+
+    def stop(self):
+        if self.trace and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self.baseline = None
+
+    def _take_snapshot(self):
+        return tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ])
+
+    def snapshot_stats(self, limit=None):
+        """
+        Returns the tracemalloc statistics that grew most since start(),
+        largest first. Empty if tracing is disabled.
+        """
+        if self.baseline is None or not tracemalloc.is_tracing():
+            return []
+        stats = self._take_snapshot().compare_to(self.baseline, 'lineno')
+        return stats[:limit or self.top]
+
+    def report(self):
+        """Logs current RSS and, if tracing, the top allocation growth."""
+        logger.info(f"Memory after {self.cycles} cycles: RSS {rss_bytes() / 1024 / 1024:.1f} MB")
+        for stat in self.snapshot_stats():
+            logger.info(f"  {stat}")
+
+    def check(self):
+        """
+        Records the end of a cycle. Returns True if RSS is above the
+        configured ceiling.
+        """
+        self.cycles += 1
+        if self.report_interval and self.cycles % self.report_interval == 0:
+            self.report()
+
+        if self.over_limit():
+            logger.warning(
+                f"RSS {rss_bytes() / 1024 / 1024:.1f} MB exceeds limit of "
+                f"{self.max_rss_bytes / 1024 / 1024:.0f} MB."
+            )
+            self.report()
+            return True
+        return False
@@ -1,74 +1,136 @@
+import re
+import sys
 import email
-from email.policy import default
+from itertools import filterfalse
+from email.policy import compat32, default
 from bs4 import BeautifulSoup
+from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
 import logging
 
 logger = logging.getLogger(__name__)
 
-def extract_features(email_bytes):
+# Same tokens as TfidfVectorizer's default r"(?u)\b\w\w+\b": a greedy run
+# of word chars always starts and ends on a word boundary, so the \b checks
+# only cost time.
+TOKEN_PATTERN = re.compile(r"\w{2,}")
+
+# Folded header lines are unfolded the same way email.policy.default does
+HEADER_LINESEP = re.compile(r"\n|\r")
+
+def _parse_message(email_bytes):
+    # compat32 keeps headers as raw strings; building the structured header
+    # objects of the default policy dominated parse time and only the
+    # Subject is ever used.
+    if isinstance(email_bytes, bytes):
+        return email.message_from_bytes(email_bytes, policy=compat32)
+    return email.message_from_string(email_bytes, policy=compat32)
+
+def _decode_subject(msg):
     """
-    Parses email bytes and returns a combined string of Subject and Body.
+    Returns the Subject decoded as email.policy.default would, covering
+    RFC 2047 encoded words and raw 8-bit UTF-8 (RFC 6532).
     """
+    for name, value in msg.raw_items():
+        if name.lower() == "subject":
+            break
+    else:
+        return ""
     try:
-        # Parse email bytes
-        if isinstance(email_bytes, bytes):
-            msg = email.message_from_bytes(email_bytes, policy=default)
-        else:
-            msg = email.message_from_string(email_bytes, policy=default)
-
-        # Get Subject
-        subject = msg.get("subject", "")
-
-        # Get Body (Text/HTML)
-        body = ""
-        if msg.is_multipart():
-            for part in msg.walk():
-                content_type = part.get_content_type()
-                content_disposition = str(part.get("Content-Disposition"))
-
-                if "attachment" in content_disposition:
-                    continue
+        # Only the Subject goes through the structured header parser
+        return str(default.header_factory("subject", HEADER_LINESEP.sub("", value)))
+    except Exception as e:
+        logger.warning(f"Error decoding subject: {e}")
+        return str(value)
+
+def _decode_part(part):
+    """Returns the decoded text of a single MIME part, or None."""
+    payload = part.get_payload(decode=True)
+    if not payload:
+        return None
+    charset = part.get_content_charset() or 'utf-8'
+    return payload.decode(charset, errors='replace')
+
+def _html_chunks(html):
+    """Yields the text nodes of an HTML document."""
+    soup = BeautifulSoup(html, "html.parser")
+    try:
+        yield from soup.stripped_strings
+    finally:
+        # The tree is full of reference cycles; free it now instead of at the next GC
+        soup.decompose()
+
+def iter_text_chunks(email_bytes):
+    """
+    Yields the Subject followed by each decoded text chunk of the body,
+    without joining them into one string.
+    """
+    msg = _parse_message(email_bytes)
+
+    yield _decode_subject(msg)
+
+    if msg.is_multipart():
+        for part in msg.walk():
+            content_type = part.get_content_type()
+            content_disposition = str(part.get("Content-Disposition"))
+
+            if "attachment" in content_disposition:
+                continue
 
-                try:
-                    payload = part.get_payload(decode=True)
-                    if payload:
-                        charset = part.get_content_charset() or 'utf-8'
-                        decoded_payload = payload.decode(charset, errors='replace')
-                        
-                        if content_type == "text/plain":
-                            body += decoded_payload + " "
-                        elif content_type == "text/html":
-                            # Strip HTML tags
-                            soup = BeautifulSoup(decoded_payload, "html.parser")
-                            body += soup.get_text(separator=" ") + " "
-                except Exception as e:
-                    logger.warning(f"Error parsing part: {e}")
-        else:
-            # Single part
             try:
-                payload = msg.get_payload(decode=True)
-                if payload:
-                    charset = msg.get_content_charset() or 'utf-8'
-                    decoded_payload = payload.decode(charset, errors='replace')
-                    
-                    if msg.get_content_type() == "text/html":
-                        soup = BeautifulSoup(decoded_payload, "html.parser")
-                        body += soup.get_text(separator=" ")
-                    else:
-                        body += decoded_payload
+                decoded_payload = _decode_part(part)
+                if not decoded_payload:
+                    continue
+
+                if content_type == "text/plain":
+                    yield decoded_payload
+                elif content_type == "text/html":
+                    # Strip HTML tags
+                    yield from _html_chunks(decoded_payload)
             except Exception as e:
-                logger.warning(f"Error parsing body: {e}")
-
-        # Combine Subject and Body
-        # Adding Subject multiple times or giving it simple weight?
-        # For now, just concatenate.
-        combined_text = f"{subject} {body}"
-        
-        # Basic cleaning (newlines, extra spaces)
-        combined_text = " ".join(combined_text.split())
-        
-        return combined_text
-    
+                logger.warning(f"Error parsing part: {e}")
+    else:
+        # Single part
+        try:
+            decoded_payload = _decode_part(msg)
+            if decoded_payload:
+                if msg.get_content_type() == "text/html":
+                    yield from _html_chunks(decoded_payload)
+                else:
+                    yield decoded_payload
+        except Exception as e:
+            logger.warning(f"Error parsing body: {e}")
+
+def extract_features(email_bytes):
+    """
+    Parses email bytes and returns a combined string of Subject and Body.
+    """
+    try:
+        # Basic cleaning (newlines, extra spaces) while combining chunks
+        return " ".join(
+            word for chunk in iter_text_chunks(email_bytes) for word in chunk.split()
+        )
     except Exception as e:
         logger.error(f"Error extracting features: {e}")
         return ""
+
+def extract_tokens(email_bytes):
+    """
+    Parses email bytes and returns the lowercased, stop-word-filtered tokens
+    of Subject and Body, ready to feed a vectorizer as pre-tokenized input.
+    """
+    tokens = []
+    try:
+        findall = TOKEN_PATTERN.findall
+        is_stop_word = ENGLISH_STOP_WORDS.__contains__
+        for chunk in iter_text_chunks(email_bytes):
+            # filterfalse and map keep the per-token loop in C. Interning lets
+            # every message share one object per distinct token.
+            tokens.extend(map(sys.intern, filterfalse(is_stop_word, findall(chunk.lower()))))
+        return tokens
+    except Exception as e:
+        logger.error(f"Error extracting tokens: {e}")
+        return []
+
+def pretokenized(tokens):
+    """Analyzer for vectorizers whose documents are already token lists."""
+    return tokens
@@ -8,6 +8,8 @@ logger = logging.getLogger(__name__)
 class ImapManager:
     def __init__(self):
         self.server = None
+        self.selected_folder = None
+        self.uidvalidity = {} # folder -> UIDVALIDITY of the last SELECT
 
     def connect(self):
         """Connects to the IMAP server and logs in."""
@@ -29,6 +31,7 @@ class ImapManager:
                 logger.error(f"Error disconnecting: {e}")
             finally:
                 self.server = None
+                self.selected_folder = None
 
     def _ensure_connection(self):
         """Reconnects if the connection is lost."""
@@ -40,40 +43,98 @@ class ImapManager:
             except Exception:
                 logger.warning("Connection lost. Reconnecting...")
                 self.connect()
+                # UID commands act on the selected folder, so restore it
+                if self.selected_folder:
+                    self.select_folder(self.selected_folder)
 
-    def fetch_unseen_inbox(self):
-        """Fetches unseen messages from the Inbox."""
+    def select_folder(self, folder):
+        """Selects a folder and returns its UIDVALIDITY."""
+        # A failed SELECT leaves no folder selected on the server
+        self.selected_folder = None
+        response = self.server.select_folder(folder)
+        self.selected_folder = folder
+        uidvalidity = response.get(b'UIDVALIDITY', 0)
+        previous = self.uidvalidity.get(folder)
+        if previous is not None and previous != uidvalidity:
+            logger.warning(f"UIDVALIDITY of {folder} changed from {previous} to {uidvalidity}")
+        self.uidvalidity[folder] = uidvalidity
+        return uidvalidity
+
+    def search_unseen_inbox(self):
+        """Selects the Inbox and returns the UIDs of unseen messages."""
         self._ensure_connection()
         try:
-            self.server.select_folder(config.INBOX_FOLDER)
+            self.select_folder(config.INBOX_FOLDER)
             # Fetch messages that do NOT have any of our known tags yet?
             # Or just fetch all UNSEEN? Let's stick to UNSEEN for now as per plan.
-            messages = self.server.search(['UNSEEN'])
-            if not messages:
-                return {}
-            
+            return self.server.search(['UNSEEN'])
+        except Exception as e:
+            logger.error(f"Error searching unseen inbox: {e}")
+            return []
+
+    def fetch_messages(self, uids):
+        """Fetches the given messages from the selected folder."""
+        if not uids:
+            return {}
+        self._ensure_connection()
+        try:
             # Fetch envelope and body structure/content
-            response = self.server.fetch(messages, ['BODY.PEEK[]', 'INTERNALDATE', 'FLAGS'])
+            response = self.server.fetch(uids, ['BODY.PEEK[]', 'INTERNALDATE', 'FLAGS'])
             return response
         except Exception as e:
-            logger.error(f"Error fetching unseen inbox: {e}")
+            logger.error(f"Error fetching messages: {e}")
+            return {}
+
+    def fetch_sizes(self, uids):
+        """Returns {uid: size in bytes} for messages in the selected folder."""
+        if not uids:
+            return {}
+        self._ensure_connection()
+        try:
+            response = self.server.fetch(uids, ['RFC822.SIZE'])
+            return {uid: data.get(b'RFC822.SIZE', 0) for uid, data in response.items()}
+        except Exception as e:
+            logger.error(f"Error fetching message sizes: {e}")
             return {}
 
+    def iter_message_batches(self, uids, max_bytes):
+        """
+        Fetches messages in batches holding at most max_bytes of message
+        data each, so only one batch of bodies is in memory at a time.
+        A message larger than max_bytes, or whose size is unknown, is
+        fetched on its own.
+        """
+        sizes = self.fetch_sizes(uids)
+        batch = []
+        batch_bytes = 0
+        for uid in uids:
+            size = sizes.get(uid, max_bytes)
+            if batch and batch_bytes + size > max_bytes:
+                yield self.fetch_messages(batch)
+                batch = []
+                batch_bytes = 0
+            batch.append(uid)
+            batch_bytes += size
+        if batch:
+            yield self.fetch_messages(batch)
+
     def add_tag(self, uid, tag):
-        """Adds a keyword (tag) to a message."""
+        """Adds a keyword (tag) to a message. Returns True on success."""
         self._ensure_connection()
         try:
             # Note: IMAP keywords must be valid atoms.
             logger.info(f"Tagging message {uid} with {tag}")
             self.server.add_flags(uid, [tag])
+            return True
         except Exception as e:
             logger.error(f"Error adding tag {tag} to {uid}: {e}")
+            return False
 
     def fetch_archive_tagged(self):
         """Fetches messages in Archive that have one of our known tags."""
         self._ensure_connection()
         try:
-            self.server.select_folder(config.ARCHIVE_FOLDER)
+            self.select_folder(config.ARCHIVE_FOLDER)
             
             # Search for messages that have ANY of the keys in TAG_MAPPING
             # OR search for all messages and filter locally?
@@ -105,7 +166,10 @@ class ImapManager:
             return {}
 
     def move_message(self, uid, folder):
-        """Moves a message to a specific folder."""
+        """
+        Moves a message to a specific folder. Returns True on success.
+        Moving a UID that is no longer in the selected folder is a no-op.
+        """
         self._ensure_connection()
         try:
             if not self.server.folder_exists(folder):
@@ -116,8 +180,10 @@ class ImapManager:
 
             logger.info(f"Moving message {uid} to {folder}")
             self.server.move([uid], folder)
+            return True
         except Exception as e:
             logger.error(f"Error moving message {uid} to {folder}: {e}")
+            return False
 
     def get_training_data(self):
         """
@@ -138,7 +204,7 @@ class ImapManager:
                     logger.warning(f"Training folder {folder} does not exist. Skipping.")
                     continue
                 
-                self.server.select_folder(folder)
+                self.select_folder(folder)
                 # Fetch all messages? Or limit to recent?
                 # For training, more is better, but speed matters.
                 # Let's limit to last 1000? or all. 
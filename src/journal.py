@@ -0,0 +1,135 @@
+import sqlite3
+import logging
+from collections import namedtuple
+
+logger = logging.getLogger(__name__)
+
+TAG = "tag"
+MOVE = "move"
+
+Operation = namedtuple("Operation", ["id", "kind", "folder", "uidvalidity", "uid", "target"])
+
+class WorkJournal:
+    """
+    Persistent record of tag and move operations, so a restarted service
+    can resume unfinished work and skip messages it already handled.
+
+    Each operation is recorded as pending before it is sent to the server
+    and marked done once the server accepted it. Operations are keyed by
+    (kind, folder, UIDVALIDITY, UID, target), so recording the same
+    operation twice is a no-op.
+
+    Database errors (disk full, locked file) are logged and the operation
+    goes untracked, so the service keeps running without the journal.
+    """
+
+    def __init__(self, path="journal.db"):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        # WAL keeps committed operations safe if the process dies mid-cycle
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS operations (
+                id INTEGER PRIMARY KEY,
+                kind TEXT NOT NULL,
+                folder TEXT NOT NULL,
+                uidvalidity INTEGER NOT NULL,
+                uid INTEGER NOT NULL,
+                target TEXT NOT NULL,
+                done INTEGER NOT NULL DEFAULT 0,
+                UNIQUE (kind, folder, uidvalidity, uid, target)
+            )
+            """
+        )
+        self.conn.commit()
+
+    def begin(self, kind, folder, uidvalidity, uid, target):
+        """Records a pending operation and returns its id, or None on error."""
+        key = (kind, folder, uidvalidity or 0, uid, target)
+        try:
+            with self.conn:
+                self.conn.execute(
+                    "INSERT OR IGNORE INTO operations (kind, folder, uidvalidity, uid, target) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    key,
+                )
+                row = self.conn.execute(
+                    "SELECT id FROM operations WHERE kind = ? AND folder = ? "
+                    "AND uidvalidity = ? AND uid = ? AND target = ?",
+                    key,
+                ).fetchone()
+            return row[0]
+        except sqlite3.Error as e:
+            logger.error(f"Error recording {kind} operation for message {uid}: {e}")
+            return None
+
+    def complete(self, op_id):
+        """Marks an operation as done."""
+        if op_id is None:
+            return
+        try:
+            with self.conn:
+                self.conn.execute("UPDATE operations SET done = 1 WHERE id = ?", (op_id,))
+        except sqlite3.Error as e:
+            logger.error(f"Error completing operation {op_id}: {e}")
+
+    def discard(self, op_id):
+        """Forgets an operation that can no longer be applied."""
+        try:
+            with self.conn:
+                self.conn.execute("DELETE FROM operations WHERE id = ?", (op_id,))
+        except sqlite3.Error as e:
+            logger.error(f"Error discarding operation {op_id}: {e}")
+
+    def pending(self):
+        """Returns unfinished operations in the order they were recorded."""
+        try:
+            rows = self.conn.execute(
+                "SELECT id, kind, folder, uidvalidity, uid, target FROM operations "
+                "WHERE done = 0 ORDER BY id"
+            ).fetchall()
+            return [Operation(*row) for row in rows]
+        except sqlite3.Error as e:
+            logger.error(f"Error reading pending operations: {e}")
+            return []
+
+    def done_uids(self, kind, folder, uidvalidity):
+        """Returns the UIDs in a folder with a finished operation of this kind."""
+        try:
+            rows = self.conn.execute(
+                "SELECT uid FROM operations WHERE done = 1 AND kind = ? "
+                "AND folder = ? AND uidvalidity = ?",
+                (kind, folder, uidvalidity or 0),
+            ).fetchall()
+            return {row[0] for row in rows}
+        except sqlite3.Error as e:
+            logger.error(f"Error reading finished {kind} operations: {e}")
+            return set()
+
+    def prune(self, kind, folder, keep_uids=()):
+        """
+        Deletes finished operations of this kind in a folder, except those
+        for UIDs in keep_uids.
+        """
+        keep_uids = set(keep_uids)
+        try:
+            with self.conn:
+                rows = self.conn.execute(
+                    "SELECT id, uid FROM operations WHERE done = 1 AND kind = ? AND folder = ?",
+                    (kind, folder),
+                ).fetchall()
+                stale = [(op_id,) for op_id, uid in rows if uid not in keep_uids]
+                self.conn.executemany("DELETE FROM operations WHERE id = ?", stale)
+        except sqlite3.Error as e:
+            logger.error(f"Error pruning {kind} operations in {folder}: {e}")
+            return
+        if stale:
+            logger.debug(f"Pruned {len(stale)} finished {kind} operations in {folder}")
+
+    def close(self):
+        try:
+            self.conn.close()
+        except Exception as e:
+            logger.error(f"Error closing journal: {e}")
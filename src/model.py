@@ -5,7 +5,7 @@ import numpy as np
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.tree import DecisionTreeClassifier
 from sklearn.pipeline import Pipeline
-from .feature_extractor import extract_features
+from .feature_extractor import extract_tokens, pretokenized
 
 logger = logging.getLogger(__name__)
 
@@ -13,8 +13,11 @@ class TaggingModel:
     def __init__(self, model_path="model.pkl"):
         self.model_path = model_path
         self.pipeline = Pipeline([
-            ('tfidf', TfidfVectorizer(stop_words='english', max_features=5000, lowercase=True)),
-            ('clf', DecisionTreeClassifier())
+            # Lowercasing, tokenizing and stop-word filtering happen once in
+            # extract_tokens; the vectorizer only counts the tokens.
+            ('tfidf', TfidfVectorizer(analyzer=pretokenized, max_features=5000)),
+            # Fixed seed so retraining on the same data gives the same tree
+            ('clf', DecisionTreeClassifier(random_state=0))
         ])
         self.is_trained = False
 
@@ -28,16 +31,11 @@ class TaggingModel:
         X_raw = [item[0] for item in training_data]
         y = [item[1] for item in training_data]
         
-        # Preprocess features
-        # Note: We can do feature extraction here or inside the pipeline if we wrap feature_extractor.
-        # But Tfidf expects strings. So we must convert raw bytes to strings first.
-        
-        X_text = []
-        for raw in X_raw:
-            X_text.append(extract_features(raw))
+        # Preprocess features straight to token lists
+        X_tokens = [extract_tokens(raw) for raw in X_raw]
             
         try:
-            self.pipeline.fit(X_text, y)
+            self.pipeline.fit(X_tokens, y)
             self.is_trained = True
             logger.info("Training completed.")
             self.save()
@@ -53,11 +51,11 @@ class TaggingModel:
             logger.warning("Model is not trained.")
             return None
             
-        text = extract_features(raw_email_bytes)
+        tokens = extract_tokens(raw_email_bytes)
         
         try:
             # predict returns an array
-            prediction = self.pipeline.predict([text])[0]
+            prediction = self.pipeline.predict([tokens])[0]
             # optional: predict_proba to threshold confidence?
             # For decision tree, proba is usually 0 or 1 unless pruned/leaves have user samples.
             return prediction
@@ -67,7 +65,10 @@ class TaggingModel:
 
     def save(self):
         try:
-            joblib.dump(self.pipeline, self.model_path)
+            # Write to a temporary file first so a crash never leaves a truncated model
+            tmp_path = f"{self.model_path}.tmp"
+            joblib.dump(self.pipeline, tmp_path)
+            os.replace(tmp_path, self.model_path)
             logger.info(f"Model saved to {self.model_path}")
         except Exception as e:
             logger.error(f"Error saving model: {e}")
@@ -75,7 +76,12 @@ class TaggingModel:
     def load(self):
         if os.path.exists(self.model_path):
             try:
-                self.pipeline = joblib.load(self.model_path)
+                pipeline = joblib.load(self.model_path)
+                if pipeline.named_steps['tfidf'].analyzer is not pretokenized:
+                    # Saved before the vectorizer took pre-tokenized input
+                    logger.warning(f"Model at {self.model_path} uses an outdated format. Ignoring it.")
+                    return False
+                self.pipeline = pipeline
                 self.is_trained = True
                 logger.info(f"Model loaded from {self.model_path}")
                 return True
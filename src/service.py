@@ -1,8 +1,11 @@
 import time
 import logging
+from imapclient.exceptions import IMAPClientError, IMAPClientAbortError
 from .config import config
 from .imap_manager import ImapManager
 from .model import TaggingModel
+from .journal import WorkJournal, TAG, MOVE
+from .diagnostics import MemoryMonitor
 
 logger = logging.getLogger(__name__)
 
@@ -10,19 +13,70 @@ class EmailTaggerService:
     def __init__(self):
         self.imap = ImapManager()
         self.model = TaggingModel()
+        self.journal = WorkJournal(config.JOURNAL_PATH)
+        self.memory = MemoryMonitor(
+            max_rss_mb=config.MAX_RSS_MB,
+            trace=config.TRACEMALLOC,
+            report_interval=config.DIAGNOSTICS_INTERVAL,
+        )
         self.polling_interval = config.POLL_INTERVAL
+        self.restart_requested = False
+        self.trained_at_startup = False
 
     def initialize(self):
-        """Initial setup: Connect to IMAP, Load Model."""
+        """Initial setup: Connect to IMAP, Replay unfinished work, Load Model."""
         try:
             self.imap.connect()
+            self.replay_journal()
             if not self.model.load():
                 logger.info("No trained model found. Attempting initial training...")
                 self.train_model()
+                self.trained_at_startup = True
         except Exception as e:
             logger.error(f"Initialization failed: {e}")
             raise
 
+    def replay_journal(self):
+        """Re-applies tag and move operations left unfinished by a previous run."""
+        pending = self.journal.pending()
+        if not pending:
+            return
+
+        logger.info(f"Replaying {len(pending)} unfinished operations from journal.")
+
+        for op in pending:
+            try:
+                if self.imap.selected_folder != op.folder or op.folder not in self.imap.uidvalidity:
+                    self.imap.select_folder(op.folder)
+            except (IMAPClientAbortError, OSError) as e:
+                # Connection trouble: leave the rest pending for the next start
+                logger.error(f"Error replaying journal: {e}")
+                return
+            except IMAPClientError as e:
+                # The server refused the folder (renamed or deleted), so the operation can never apply
+                logger.warning(f"Dropping {op.kind} operation for message {op.uid}: cannot select {op.folder}: {e}")
+                self.journal.discard(op.id)
+                continue
+
+            if self.imap.uidvalidity[op.folder] != op.uidvalidity:
+                # UIDs from before a UIDVALIDITY change point at other messages
+                logger.warning(f"Dropping stale {op.kind} operation for message {op.uid} in {op.folder}")
+                self.journal.discard(op.id)
+                continue
+
+            # Both operations are idempotent, so repeating one that reached
+            # the server before the crash is harmless.
+            try:
+                if op.kind == TAG:
+                    done = self.imap.add_tag(op.uid, op.target)
+                else:
+                    done = self.imap.move_message(op.uid, op.target)
+            except Exception as e:
+                logger.error(f"Error replaying journal: {e}")
+                return
+            if done:
+                self.journal.complete(op.id)
+
     def train_model(self):
         """Fetches training data and trains the model."""
         logger.info("Gathering training data from folders...")
@@ -38,14 +92,32 @@ class EmailTaggerService:
     def process_inbox(self):
         """Fetches unseen messages, predicts tags, and applies them."""
         logger.debug("Checking Inbox for new messages...")
-        messages = self.imap.fetch_unseen_inbox()
+        unseen = self.imap.search_unseen_inbox()
         
-        if not messages:
+        if not unseen:
+            return
+
+        # Skip messages tagged in an earlier cycle or before a restart
+        folder = config.INBOX_FOLDER
+        uidvalidity = self.imap.uidvalidity.get(folder)
+        tagged = self.journal.done_uids(TAG, folder, uidvalidity)
+        self.journal.prune(TAG, folder, keep_uids=unseen)
+        new_uids = [uid for uid in unseen if uid not in tagged]
+
+        if not new_uids:
             return
 
-        logger.info(f"Found {len(messages)} new messages in Inbox.")
+        logger.info(f"Found {len(new_uids)} new messages in Inbox.")
         
-        for uid, data in messages.items():
+        max_bytes = config.MAX_BATCH_MB * 1024 * 1024
+        for messages in self.imap.iter_message_batches(new_uids, max_bytes):
+            self._tag_messages(messages, folder, uidvalidity)
+
+    def _tag_messages(self, messages, folder, uidvalidity):
+        """Predicts and applies tags for one batch of fetched messages."""
+        while messages:
+            # popitem releases each body as soon as it has been handled
+            uid, data = messages.popitem()
             content = data.get(b'BODY[]') or data.get(b'BODY.PEEK[]')
             if not content:
                 continue
@@ -53,7 +125,9 @@ class EmailTaggerService:
             prediction = self.model.predict(content)
             if prediction:
                 logger.info(f"Predicted tag '{prediction}' for message {uid}")
-                self.imap.add_tag(uid, prediction)
+                op_id = self.journal.begin(TAG, folder, uidvalidity, uid, prediction)
+                if self.imap.add_tag(uid, prediction):
+                    self.journal.complete(op_id)
             else:
                 logger.info(f"No prediction for message {uid}")
 
@@ -67,33 +141,58 @@ class EmailTaggerService:
 
         logger.info(f"Found {len(tagged_messages)} tagged messages in Archive.")
         
+        folder = config.ARCHIVE_FOLDER
+        uidvalidity = self.imap.uidvalidity.get(folder)
+
         # Tag Mapping: Tag -> Folder
         for uid, tag in tagged_messages.items():
             target_folder = config.TAG_MAPPING.get(tag)
             if target_folder:
-                self.imap.move_message(uid, target_folder)
+                op_id = self.journal.begin(MOVE, folder, uidvalidity, uid, target_folder)
+                if self.imap.move_message(uid, target_folder):
+                    self.journal.complete(op_id)
             else:
                 logger.warning(f"No folder mapping found for tag '{tag}'")
 
+        # Moved messages have left the Archive, so their records are no longer needed
+        self.journal.prune(MOVE, folder)
+
+    def run_cycle(self):
+        """Runs one polling cycle."""
+        # 1. Prediction Loop
+        # Only predict if model is trained
+        if self.model.is_trained:
+            self.process_inbox()
+        else:
+            logger.warning("Model not trained. Skipping Inbox processing.")
+
+        # 2. Archiving Loop
+        self.process_archive()
+
+        # 3. Retraining Check? (Optional, maybe trigger periodically or manually)
+
     def run(self):
-        """Main service loop."""
+        """
+        Main service loop. Returns with restart_requested set if memory use
+        exceeded MAX_RSS_MB, so the caller can exit and be restarted.
+        """
         self.initialize()
+        # Training holds every training message in memory. After a restart the
+        # saved model is loaded instead, so keep the ceiling even if training
+        # pushed RSS over it.
+        self.memory.start(keep_limit=self.trained_at_startup)
         
         logger.info(f"Service running. Polling every {self.polling_interval} seconds.")
         
         try:
             while True:
-                # 1. Prediction Loop
-                # Only predict if model is trained
-                if self.model.is_trained:
-                    self.process_inbox()
-                else:
-                    logger.warning("Model not trained. Skipping Inbox processing.")
+                self.run_cycle()
 
-                # 2. Archiving Loop
-                self.process_archive()
-                
-                # 3. Retraining Check? (Optional, maybe trigger periodically or manually)
+                if self.memory.check():
+                    # The journal lets a fresh process pick up where this one stopped
+                    logger.warning("Memory limit exceeded. Stopping service for restart...")
+                    self.restart_requested = True
+                    break
                 
                 time.sleep(self.polling_interval)
                 
@@ -103,3 +202,5 @@ class EmailTaggerService:
             logger.error(f"Service crashed: {e}")
         finally:
             self.imap.disconnect()
+            self.journal.close()
+            self.memory.stop()
@@ -0,0 +1,43 @@
+import unittest
+from src.diagnostics import MemoryMonitor, rss_bytes
+
+class TestMemoryMonitor(unittest.TestCase):
+    def test_rss_bytes(self):
+        self.assertGreater(rss_bytes(), 0)
+
+    def test_check_without_limit(self):
+        monitor = MemoryMonitor(max_rss_mb=0)
+        self.assertFalse(monitor.check())
+        self.assertEqual(monitor.cycles, 1)
+
+    def test_check_over_limit(self):
+        # Any running interpreter uses more than 1 MB
+        monitor = MemoryMonitor(max_rss_mb=1)
+        self.assertTrue(monitor.check())
+
+    def test_limit_exceeded_at_start_is_disabled(self):
+        # Restarting cannot bring RSS under 1 MB, so the limit must not loop restarts
+        monitor = MemoryMonitor(max_rss_mb=1)
+        monitor.start()
+        self.assertFalse(monitor.check())
+
+    def test_limit_kept_when_restart_helps(self):
+        monitor = MemoryMonitor(max_rss_mb=1)
+        monitor.start(keep_limit=True)
+        self.assertTrue(monitor.check())
+
+    def test_snapshot_stats(self):
+        monitor = MemoryMonitor(trace=True)
+        self.assertEqual(monitor.snapshot_stats(), [])
+        monitor.start()
+        try:
+            retained = [bytearray(1024) for _ in range(1000)]
+            stats = monitor.snapshot_stats(limit=1)
+            self.assertEqual(len(stats), 1)
+            self.assertGreater(stats[0].size_diff, 0)
+        finally:
+            monitor.stop()
+        self.assertEqual(monitor.snapshot_stats(), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,7 @@
 import unittest
 from email.message import EmailMessage
-from src.feature_extractor import extract_features
+from sklearn.feature_extraction.text import TfidfVectorizer
+from src.feature_extractor import extract_features, extract_tokens
 
 class TestFeatureExtractor(unittest.TestCase):
     def test_basic_text_email(self):
@@ -31,5 +32,29 @@ class TestFeatureExtractor(unittest.TestCase):
         text = extract_features(b"")
         self.assertEqual(text, "")
 
+    def test_tokens_match_vectorizer_preprocessing(self):
+        msg = EmailMessage()
+        msg.set_content("The Quarterly REPORT is attached to this email")
+        msg.add_alternative("<p>Budget <b>review</b> meeting</p>", subtype='html')
+        msg['Subject'] = "Q3 Report"
+        encoded = (
+            b"Subject: =?utf-8?q?Caf=C3=A9_Men=C3=BC?= for =?utf-8?b?R3LDvMOfZQ==?=\n"
+            b"Content-Type: text/plain; charset=utf-8\n\n"
+            b"Lunch is at noon"
+        )
+        # Raw 8-bit UTF-8 header (RFC 6532)
+        raw_utf8 = "Subject: Grüße aus München\n\nBis bald".encode("utf-8")
+
+        analyzer = TfidfVectorizer(stop_words='english').build_analyzer()
+        for raw in (msg.as_bytes(), encoded, raw_utf8):
+            self.assertEqual(extract_tokens(raw), analyzer(extract_features(raw)))
+
+        # Encoded words in the Subject are decoded before tokenizing
+        self.assertEqual(extract_tokens(encoded)[:3], ["café", "menü", "grüße"])
+        self.assertEqual(extract_tokens(raw_utf8)[:3], ["grüße", "aus", "münchen"])
+
+    def test_empty_email_tokens(self):
+        self.assertEqual(extract_tokens(b""), [])
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+from unittest.mock import MagicMock
+from src.imap_manager import ImapManager
+
+class TestImapManager(unittest.TestCase):
+    def setUp(self):
+        self.imap = ImapManager()
+        self.imap.server = MagicMock()
+
+    def test_iter_message_batches(self):
+        sizes = {1: 400, 2: 400, 3: 400, 4: 2000, 5: 100}
+        self.imap.server.fetch.side_effect = lambda uids, items: (
+            {uid: {b'RFC822.SIZE': sizes[uid]} for uid in uids}
+            if items == ['RFC822.SIZE']
+            else {uid: {b'BODY[]': b"x"} for uid in uids}
+        )
+
+        batches = [sorted(batch) for batch in self.imap.iter_message_batches([1, 2, 3, 4, 5], 1000)]
+
+        # The oversized message 4 is fetched on its own
+        self.assertEqual(batches, [[1, 2], [3], [4], [5]])
+
+    def test_iter_message_batches_without_sizes(self):
+        def fetch(uids, items):
+            if items == ['RFC822.SIZE']:
+                raise Exception("BAD fetch failed")
+            return {uid: {b'BODY[]': b"x"} for uid in uids}
+        self.imap.server.fetch.side_effect = fetch
+
+        batches = [sorted(batch) for batch in self.imap.iter_message_batches([1, 2, 3], 1000)]
+
+        # Unknown sizes never let a batch grow unbounded
+        self.assertEqual(batches, [[1], [2], [3]])
+
+    def test_reconnect_reselects_folder(self):
+        self.imap.server.select_folder.return_value = {b'UIDVALIDITY': 7}
+        self.imap.select_folder("INBOX")
+        self.imap.server.noop.side_effect = Exception("connection reset")
+        self.imap.connect = MagicMock()
+
+        self.imap._ensure_connection()
+
+        self.imap.connect.assert_called_once()
+        self.assertEqual(self.imap.server.select_folder.call_count, 2)
+        self.assertEqual(self.imap.uidvalidity, {"INBOX": 7})
+
+if __name__ == '__main__':
+    unittest.main()
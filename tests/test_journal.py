@@ -0,0 +1,65 @@
+import unittest
+import os
+import tempfile
+import shutil
+from src.journal import WorkJournal, TAG, MOVE
+
+class TestWorkJournal(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, "journal.db")
+        self.journal = WorkJournal(self.path)
+
+    def tearDown(self):
+        self.journal.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_pending_survives_restart(self):
+        tag_id = self.journal.begin(TAG, "INBOX", 7, 101, "Work")
+        move_id = self.journal.begin(MOVE, "Archive", 9, 201, "WorkFolder")
+        self.journal.complete(tag_id)
+        self.journal.close()
+
+        # Simulate a restart
+        self.journal = WorkJournal(self.path)
+        pending = self.journal.pending()
+        self.assertEqual(len(pending), 1)
+        self.assertEqual(pending[0].id, move_id)
+        self.assertEqual(pending[0].target, "WorkFolder")
+        self.assertEqual(self.journal.done_uids(TAG, "INBOX", 7), {101})
+
+    def test_begin_is_idempotent(self):
+        first = self.journal.begin(TAG, "INBOX", 7, 101, "Work")
+        second = self.journal.begin(TAG, "INBOX", 7, 101, "Work")
+        self.assertEqual(first, second)
+        self.assertEqual(len(self.journal.pending()), 1)
+
+    def test_done_uids_respects_uidvalidity(self):
+        self.journal.complete(self.journal.begin(TAG, "INBOX", 7, 101, "Work"))
+        self.assertEqual(self.journal.done_uids(TAG, "INBOX", 8), set())
+
+    def test_prune(self):
+        self.journal.complete(self.journal.begin(TAG, "INBOX", 7, 101, "Work"))
+        self.journal.complete(self.journal.begin(TAG, "INBOX", 7, 102, "Work"))
+        self.journal.begin(TAG, "INBOX", 7, 103, "Work")
+
+        self.journal.prune(TAG, "INBOX", keep_uids=[102])
+
+        self.assertEqual(self.journal.done_uids(TAG, "INBOX", 7), {102})
+        # Pending operations are never pruned
+        self.assertEqual([op.uid for op in self.journal.pending()], [103])
+
+    def test_database_errors_are_not_raised(self):
+        # Simulates a locked or unwritable database
+        self.journal.conn.close()
+
+        op_id = self.journal.begin(TAG, "INBOX", 7, 101, "Work")
+        self.assertIsNone(op_id)
+        self.journal.complete(op_id)
+        self.journal.discard(1)
+        self.journal.prune(TAG, "INBOX")
+        self.assertEqual(self.journal.pending(), [])
+        self.assertEqual(self.journal.done_uids(TAG, "INBOX", 7), set())
+
+if __name__ == '__main__':
+    unittest.main()
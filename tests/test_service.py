@@ -1,12 +1,15 @@
 import unittest
-from unittest.mock import MagicMock, patch
+from unittest.mock import MagicMock, call, patch
+from imapclient.exceptions import IMAPClientError, IMAPClientAbortError
 from src.service import EmailTaggerService
 from src.config import config
+from src.journal import Operation, TAG, MOVE
 
 class TestEmailTaggerService(unittest.TestCase):
+    @patch('src.service.WorkJournal')
     @patch('src.service.ImapManager')
     @patch('src.service.TaggingModel')
-    def test_initialization_trains_if_needed(self, MockModel, MockImap):
+    def test_initialization_trains_if_needed(self, MockModel, MockImap, MockJournal):
         # Setup
         service = EmailTaggerService()
         service.model.load.return_value = False # Not trained
@@ -19,25 +22,44 @@ class TestEmailTaggerService(unittest.TestCase):
         service.imap.connect.assert_called_once()
         service.model.train.assert_called_once()
 
+    @patch('src.service.WorkJournal')
     @patch('src.service.ImapManager')
     @patch('src.service.TaggingModel')
-    def test_process_inbox(self, MockModel, MockImap):
+    def test_process_inbox(self, MockModel, MockImap, MockJournal):
         service = EmailTaggerService()
         service.model.predict.return_value = "Work"
-        # Mock fetch_unseen_inbox returning dict of {uid: {data...}}
+        service.imap.search_unseen_inbox.return_value = [101]
+        service.journal.done_uids.return_value = set()
+        # Mock iter_message_batches returning batches of {uid: {data...}}
         # data structure: {b'BODY[]': b'content'}
-        service.imap.fetch_unseen_inbox.return_value = {
-            101: {b'BODY[]': b"Meeting about project"}
-        }
+        service.imap.iter_message_batches.return_value = [
+            {101: {b'BODY[]': b"Meeting about project"}}
+        ]
         
         service.process_inbox()
         
         service.model.predict.assert_called_with(b"Meeting about project")
         service.imap.add_tag.assert_called_with(101, "Work")
+        service.journal.complete.assert_called_once_with(service.journal.begin.return_value)
+
+    @patch('src.service.WorkJournal')
+    @patch('src.service.ImapManager')
+    @patch('src.service.TaggingModel')
+    def test_process_inbox_skips_tagged(self, MockModel, MockImap, MockJournal):
+        service = EmailTaggerService()
+        service.imap.search_unseen_inbox.return_value = [101, 102]
+        service.journal.done_uids.return_value = {101}
+        service.imap.iter_message_batches.return_value = []
 
+        service.process_inbox()
+
+        service.imap.iter_message_batches.assert_called_once_with([102], config.MAX_BATCH_MB * 1024 * 1024)
+        service.journal.prune.assert_called_once_with(TAG, config.INBOX_FOLDER, keep_uids=[101, 102])
+
+    @patch('src.service.WorkJournal')
     @patch('src.service.ImapManager')
     @patch('src.service.TaggingModel')
-    def test_process_archive(self, MockModel, MockImap):
+    def test_process_archive(self, MockModel, MockImap, MockJournal):
         service = EmailTaggerService()
         
         # Setup Config Mapping
@@ -60,5 +82,104 @@ class TestEmailTaggerService(unittest.TestCase):
         # We expect 2 valid calls.
         self.assertEqual(service.imap.move_message.call_count, 2)
 
+    @patch('src.service.WorkJournal')
+    @patch('src.service.ImapManager')
+    @patch('src.service.TaggingModel')
+    def test_replay_journal(self, MockModel, MockImap, MockJournal):
+        service = EmailTaggerService()
+        service.imap.selected_folder = None
+        service.imap.uidvalidity = {"INBOX": 7, "Archive": 9}
+        service.journal.pending.return_value = [
+            Operation(1, TAG, "INBOX", 7, 101, "Work"),
+            Operation(2, MOVE, "Archive", 9, 201, "WorkFolder"),
+            Operation(3, MOVE, "Archive", 8, 202, "WorkFolder"), # Stale UIDVALIDITY
+        ]
+        service.imap.add_tag.return_value = True
+        service.imap.move_message.return_value = False # Stays pending
+
+        service.replay_journal()
+
+        service.imap.add_tag.assert_called_once_with(101, "Work")
+        service.imap.move_message.assert_called_once_with(201, "WorkFolder")
+        service.journal.complete.assert_called_once_with(1)
+        service.journal.discard.assert_called_once_with(3)
+
+    @patch('src.service.WorkJournal')
+    @patch('src.service.ImapManager')
+    @patch('src.service.TaggingModel')
+    def test_replay_journal_unselectable_folder(self, MockModel, MockImap, MockJournal):
+        service = EmailTaggerService()
+        service.imap.selected_folder = None
+        service.imap.uidvalidity = {"INBOX": 7}
+        service.imap.select_folder.side_effect = IMAPClientError("NO [NONEXISTENT] Mailbox doesn't exist")
+        service.journal.pending.return_value = [
+            Operation(1, MOVE, "Gone", 9, 201, "WorkFolder"),
+            Operation(2, MOVE, "Gone", 9, 202, "WorkFolder"),
+        ]
+        service.model.load.return_value = True
+
+        # Must not keep the service from starting
+        service.initialize()
+
+        service.imap.move_message.assert_not_called()
+        self.assertEqual(service.journal.discard.call_args_list, [call(1), call(2)])
+
+    @patch('src.service.WorkJournal')
+    @patch('src.service.ImapManager')
+    @patch('src.service.TaggingModel')
+    def test_replay_journal_connection_lost(self, MockModel, MockImap, MockJournal):
+        service = EmailTaggerService()
+        service.imap.selected_folder = None
+        service.imap.uidvalidity = {}
+        service.imap.select_folder.side_effect = IMAPClientAbortError("socket error: EOF")
+        service.journal.pending.return_value = [
+            Operation(1, TAG, "INBOX", 7, 101, "Work"),
+        ]
+
+        service.replay_journal()
+
+        # Kept pending for the next start
+        service.journal.discard.assert_not_called()
+        service.journal.complete.assert_not_called()
+
+    @patch('src.service.WorkJournal')
+    @patch('src.service.ImapManager')
+    @patch('src.service.TaggingModel')
+    @patch('src.service.time.sleep')
+    def test_run_requests_restart_over_memory_limit(self, mock_sleep, MockModel, MockImap, MockJournal):
+        service = EmailTaggerService()
+        service.model.load.return_value = True
+        service.memory = MagicMock()
+        service.memory.check.side_effect = [False, True]
+
+        service.run()
+
+        self.assertTrue(service.restart_requested)
+        self.assertEqual(service.memory.check.call_count, 2)
+        service.imap.disconnect.assert_called_once()
+        service.journal.close.assert_called_once()
+
+    @patch('src.service.WorkJournal')
+    @patch('src.service.ImapManager')
+    @patch('src.service.TaggingModel')
+    @patch('src.service.time.sleep')
+    def test_memory_limit_kept_after_startup_training(self, mock_sleep, MockModel, MockImap, MockJournal):
+        config.MAX_RSS_MB = 1 # Always exceeded, as if training pushed RSS over the limit
+        try:
+            service = EmailTaggerService()
+        finally:
+            config.MAX_RSS_MB = 0
+        service.model.load.return_value = False
+        service.imap.get_training_data.return_value = [("content", "Tag")]
+        service.imap.search_unseen_inbox.return_value = []
+        service.imap.fetch_archive_tagged.return_value = {}
+
+        service.run()
+
+        # The next start loads the saved model instead of training, so restart
+        service.model.train.assert_called_once()
+        self.assertTrue(service.restart_requested)
+        mock_sleep.assert_not_called()
+
 if __name__ == '__main__':
     unittest.main()